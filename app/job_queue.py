@@ -0,0 +1,70 @@
+import os
+import json
+import logging
+from typing import Dict, Optional
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional at runtime
+    redis = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Redis list used as the conversion work queue
+QUEUE_KEY = "conversion_queue"
+
+# Maximum number of queued jobs before new submissions are rejected
+MAX_QUEUE_SIZE = int(os.getenv("MAX_QUEUE_SIZE", 100))
+
+class QueueFullError(Exception):
+    """Raised when the conversion queue has reached its size limit"""
+
+class RedisJobQueue:
+    """Bounded Redis list used to hand conversion jobs to worker processes"""
+
+    # Check-and-push as one atomic script so concurrent submitters (or
+    # multiple uvicorn workers) can't race the bound past MAX_QUEUE_SIZE
+    _ENQUEUE_SCRIPT = """
+    if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+        return 0
+    end
+    redis.call('LPUSH', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    def __init__(self, redis_url: str):
+        self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self._redis.ping()
+        self._enqueue_script = self._redis.register_script(self._ENQUEUE_SCRIPT)
+        logger.info("Connected to Redis job queue")
+
+    def enqueue(self, payload: Dict) -> None:
+        """Push a job onto the queue, rejecting it if the queue is full"""
+        pushed = self._enqueue_script(
+            keys=[QUEUE_KEY],
+            args=[MAX_QUEUE_SIZE, json.dumps(payload)]
+        )
+        if not pushed:
+            raise QueueFullError(f"Conversion queue is full ({MAX_QUEUE_SIZE} jobs)")
+
+    def dequeue(self, timeout: int = 5) -> Optional[Dict]:
+        """Pop the oldest job, blocking up to `timeout` seconds"""
+        item = self._redis.brpop(QUEUE_KEY, timeout=timeout)
+        return json.loads(item[1]) if item is not None else None
+
+def create_job_queue() -> Optional[RedisJobQueue]:
+    """Create the job queue configured for this deployment
+
+    Returns a RedisJobQueue when REDIS_URL is set so conversions run in
+    dedicated worker processes, or None to keep them in the API server's
+    thread pool.
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        if redis is None:
+            raise RuntimeError("REDIS_URL is set but the redis package is not installed")
+        return RedisJobQueue(redis_url)
+
+    logger.info("REDIS_URL not set, conversions will run in the API server's thread pool")
+    return None
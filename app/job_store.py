@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional at runtime
+    redis = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# How long finished (and orphaned) jobs are kept before expiring
+JOB_TTL_SECONDS = 3600
+
+@dataclass(slots=True)
+class Job:
+    """In-process record of a conversion job"""
+    status: str
+    progress: int
+    filename: str
+    output_format: str
+    created_at: float
+    result: Optional[Dict] = None
+
+class InMemoryJobStore:
+    """Process-local job store (development / single-worker fallback)"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        # Monotonic creation times used for expiry, immune to wall-clock
+        # jumps (the job's created_at stays wall-clock for display)
+        self._created: Dict[str, float] = {}
+
+    def create(self, job_id: str, job: Dict) -> None:
+        """Store a new job"""
+        self._jobs[job_id] = Job(**job)
+        self._created[job_id] = time.monotonic()
+
+    def update(self, job_id: str, **fields) -> None:
+        """Update fields of an existing job"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            for field, value in fields.items():
+                setattr(job, field, value)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job by ID, or None if it doesn't exist"""
+        job = self._jobs.get(job_id)
+        return asdict(job) if job is not None else None
+
+    def delete(self, job_id: str) -> None:
+        """Delete a job"""
+        self._jobs.pop(job_id, None)
+        self._created.pop(job_id, None)
+
+    def counts(self) -> Dict[str, int]:
+        """Count stored jobs by status (for server stats)"""
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def purge_expired(self) -> int:
+        """Remove jobs older than JOB_TTL_SECONDS, returning how many"""
+        cutoff = time.monotonic() - JOB_TTL_SECONDS
+        expired = [job_id for job_id, created in self._created.items() if created < cutoff]
+        for job_id in expired:
+            self.delete(job_id)
+        return len(expired)
+
+class RedisJobStore:
+    """Redis-backed job store shared across worker processes
+
+    Besides the per-job keys, one Redis set per status tracks job IDs so
+    /server-stats can count jobs with SCARD instead of scanning and
+    deserializing every job.
+    """
+
+    KEY_PREFIX = "conversion_job:"
+    STATUS_SET_PREFIX = "conversion_jobs_by_status:"
+    STATUSES = ("queued", "processing", "completed", "failed")
+
+    def __init__(self, redis_url: str):
+        self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self._redis.ping()
+        logger.info("Connected to Redis job store")
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}{job_id}"
+
+    def _status_key(self, status: str) -> str:
+        return f"{self.STATUS_SET_PREFIX}{status}"
+
+    def create(self, job_id: str, job: Dict) -> None:
+        """Store a new job with an expiry so orphaned jobs clean themselves up"""
+        pipe = self._redis.pipeline()
+        pipe.set(self._key(job_id), json.dumps(job), ex=JOB_TTL_SECONDS)
+        pipe.sadd(self._status_key(job["status"]), job_id)
+        pipe.execute()
+
+    def update(self, job_id: str, **fields) -> None:
+        """Update fields of an existing job, refreshing its expiry"""
+        key = self._key(job_id)
+        raw = self._redis.get(key)
+        if raw is None:
+            return
+        job = json.loads(raw)
+        old_status = job["status"]
+        job.update(fields)
+
+        pipe = self._redis.pipeline()
+        pipe.set(key, json.dumps(job), ex=JOB_TTL_SECONDS)
+        if job["status"] != old_status:
+            pipe.srem(self._status_key(old_status), job_id)
+            pipe.sadd(self._status_key(job["status"]), job_id)
+        pipe.execute()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job by ID, or None if it doesn't exist or has expired"""
+        raw = self._redis.get(self._key(job_id))
+        return json.loads(raw) if raw is not None else None
+
+    def delete(self, job_id: str) -> None:
+        """Delete a job"""
+        pipe = self._redis.pipeline()
+        pipe.delete(self._key(job_id))
+        for status in self.STATUSES:
+            pipe.srem(self._status_key(status), job_id)
+        pipe.execute()
+
+    def counts(self) -> Dict[str, int]:
+        """Count stored jobs by status (for server stats)"""
+        pipe = self._redis.pipeline()
+        for status in self.STATUSES:
+            pipe.scard(self._status_key(status))
+        return dict(zip(self.STATUSES, pipe.execute()))
+
+    def purge_expired(self) -> int:
+        """Drop status-set entries whose job keys have expired
+
+        Redis expires the job keys themselves via per-key TTLs, but set
+        members don't expire with them, so the periodic sweep reconciles
+        the status sets against the surviving keys.
+        """
+        removed = 0
+        for status in self.STATUSES:
+            set_key = self._status_key(status)
+            for job_id in self._redis.smembers(set_key):
+                if not self._redis.exists(self._key(job_id)):
+                    self._redis.srem(set_key, job_id)
+                    removed += 1
+        return removed
+
+def create_job_store():
+    """Create the job store configured for this deployment
+
+    Uses Redis when REDIS_URL is set so job state survives restarts and
+    is shared across worker processes; falls back to an in-process dict
+    otherwise (suitable for a single worker only).
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        if redis is None:
+            raise RuntimeError("REDIS_URL is set but the redis package is not installed")
+        return RedisJobStore(redis_url)
+
+    logger.info("REDIS_URL not set, using in-process job store (single worker only)")
+    return InMemoryJobStore()
@@ -1,27 +1,39 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import anyio
 import os
+import re
 import asyncio
+import time
 import uuid
 from pathlib import Path
 import logging
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Optional
+from typing import Optional
 
 from .models import ConversionResponse, OutputFormat, HealthResponse
-from .utils import DoclingConverter, save_uploaded_file, cleanup_file, get_file_info, is_supported_file
+from .utils import (
+    DoclingConverter, run_conversion, save_uploaded_file, cleanup_file,
+    cleanup_old_results, get_file_info, is_supported_file,
+    validate_content_length, RESULTS_DIR
+)
+from .job_store import create_job_store, JOB_TTL_SECONDS
+from .job_queue import create_job_queue, QueueFullError
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
+# Initialize FastAPI app (orjson serializes large conversion payloads
+# much faster than the stdlib json encoder)
 app = FastAPI(
     title="Docling Document Converter API",
     description="API for converting documents using Docling",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware to allow frontend connections
@@ -33,6 +45,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse requests whose declared size exceeds the upload limit
+
+    Runs before routing and multipart parsing, so oversized uploads are
+    rejected from the Content-Length header before any of the body is
+    consumed.
+    """
+    if request.method == "POST" and request.url.path in ("/convert", "/convert-async"):
+        try:
+            validate_content_length(request.headers.get("content-length"))
+        except HTTPException as exc:
+            return ORJSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return await call_next(request)
+
 # Initialize Docling converter and thread pool
 try:
     docling_converter = DoclingConverter()
@@ -41,11 +68,55 @@ except Exception as e:
     logger.error(f"Failed to initialize Docling converter: {e}")
     docling_converter = None
 
-# Thread pool for concurrent processing
-executor = ThreadPoolExecutor(max_workers=4)  # Adjust based on server capacity
+# Thread pool size, configurable per deployment (defaults to CPU count)
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", os.cpu_count() or 4))
+
+# Shared thread pool for concurrent processing, created at startup so it can
+# also be installed as the event loop's default executor
+executor: Optional[ThreadPoolExecutor] = None
 
-# In-memory store for conversion jobs (in production, use Redis or database)
-conversion_jobs: Dict[str, Dict] = {}
+@app.on_event("startup")
+async def setup_thread_pool():
+    """Size both thread pools from THREAD_POOL_SIZE
+
+    run_in_threadpool goes through anyio's worker pool (default limit
+    40), not the loop's default executor, so its limiter must be capped
+    as well or the conversion hot path stays effectively unbounded.
+    """
+    global executor
+    executor = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE)
+    asyncio.get_running_loop().set_default_executor(executor)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_POOL_SIZE
+    logger.info(f"Thread pools initialized with {THREAD_POOL_SIZE} workers")
+
+# How often stale jobs are swept from the job store
+JOB_CLEANUP_INTERVAL = 300  # seconds
+
+@app.on_event("startup")
+async def start_job_cleanup():
+    """Start the periodic sweep that expires stale conversion jobs"""
+    async def purge_loop():
+        while True:
+            await asyncio.sleep(JOB_CLEANUP_INTERVAL)
+            try:
+                # The store client is synchronous; keep its network round
+                # trips (and the result-dir disk I/O) off the event loop
+                removed = await run_in_threadpool(job_store.purge_expired)
+                if removed:
+                    logger.info(f"Expired {removed} stale conversion jobs")
+                removed_files = await run_in_threadpool(cleanup_old_results, JOB_TTL_SECONDS)
+                if removed_files:
+                    logger.info(f"Removed {removed_files} stale result files")
+            except Exception as e:
+                logger.error(f"Error purging stale jobs: {e}")
+
+    asyncio.create_task(purge_loop())
+
+# Store for conversion jobs (Redis when REDIS_URL is set, in-process otherwise)
+job_store = create_job_store()
+
+# Bounded queue feeding dedicated worker processes (None without REDIS_URL)
+job_queue = create_job_queue()
 
 @app.get("/")
 async def home():
@@ -63,14 +134,31 @@ async def home():
         }
     }
 
+# Static responses, built once since converter availability is fixed at import
+HEALTH_RESPONSE = HealthResponse(
+    status="healthy" if docling_converter else "unhealthy",
+    message="Docling Document Converter is running" if docling_converter else "Docling converter not available",
+    version="1.0.0"
+)
+
+SUPPORTED_FORMATS = {
+    "input_formats": [
+        "PDF", "DOCX", "PPTX", "XLSX", "HTML", "MD",
+        "Images (JPG, PNG, GIF, BMP, TIFF)", "CSV", "XML"
+    ],
+    "output_formats": [
+        {"value": "markdown", "label": "Markdown"},
+        {"value": "html", "label": "HTML"},
+        {"value": "json", "label": "JSON"},
+        {"value": "text", "label": "Plain Text"},
+        {"value": "doctags", "label": "DocTags"}
+    ]
+}
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse(
-        status="healthy" if docling_converter else "unhealthy",
-        message="Docling Document Converter is running" if docling_converter else "Docling converter not available",
-        version="1.0.0"
-    )
+    return HEALTH_RESPONSE
 
 def process_document_sync(
     file_path: str,
@@ -80,126 +168,83 @@ def process_document_sync(
     """Synchronous document processing function for thread pool"""
     try:
         # Update job status
-        conversion_jobs[job_id]["status"] = "processing"
-        conversion_jobs[job_id]["progress"] = 10
+        job_store.update(job_id, status="processing", progress=10)
 
-        # Convert document
-        success, result, metadata = docling_converter.convert_document(
-            file_path,
-            output_format
-        )
+        # Convert document via the shared conversion path
+        result = run_conversion(docling_converter, file_path, output_format)
 
-        conversion_jobs[job_id]["progress"] = 90
-
-        if success:
-            conversion_jobs[job_id].update({
-                "status": "completed",
-                "progress": 100,
-                "result": {
-                    "success": True,
-                    "message": "Document converted successfully",
-                    "content": result,
-                    "metadata": metadata
-                }
-            })
-        else:
-            conversion_jobs[job_id].update({
-                "status": "failed",
-                "progress": 100,
-                "result": {
-                    "success": False,
-                    "message": "Conversion failed",
-                    "error": result
-                }
-            })
-    except Exception as e:
-        conversion_jobs[job_id].update({
-            "status": "failed",
-            "progress": 100,
-            "result": {
-                "success": False,
-                "message": "Internal server error",
-                "error": str(e)
-            }
-        })
+        job_store.update(
+            job_id,
+            status="completed" if result["success"] else "failed",
+            progress=100,
+            result=result
+        )
     finally:
         # Clean up file
         cleanup_file(file_path)
 
-@app.post("/convert", response_model=ConversionResponse)
-async def convert_document(
-    file: UploadFile = File(...),
-    output_format: OutputFormat = Form(OutputFormat.MARKDOWN),
-    include_images: bool = Form(True),
-    include_tables: bool = Form(True)
-):
+async def _ingest_upload(file: UploadFile) -> tuple:
     """
-    Convert uploaded document to specified format
+    Validate an upload and stream it to disk
+
+    Shared by /convert and /convert-async: checks converter availability,
+    filename and file type, then saves the upload (size limit enforced
+    while copying).
+
+    Returns:
+        Tuple of (path to saved file, file size in bytes)
     """
     if not docling_converter:
         raise HTTPException(status_code=500, detail="Docling converter not available")
-    
+
     # Validate file
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
-    
+
     if not is_supported_file(file.filename):
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail=f"Unsupported file type. Supported formats: PDF, DOCX, PPTX, XLSX, HTML, MD, Images, CSV, XML"
         )
-    
-    # Check file size (limit to 50MB)
-    content = await file.read()
-    if len(content) > 50 * 1024 * 1024:  # 50MB
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 50MB")
-    
-    file_path = None
+
+    return await save_uploaded_file(file, file.filename)
+
+@app.post("/convert", response_model=ConversionResponse)
+async def convert_document(
+    file: UploadFile = File(...),
+    output_format: OutputFormat = Form(OutputFormat.MARKDOWN),
+    include_images: bool = Form(True),
+    include_tables: bool = Form(True)
+):
+    """
+    Convert uploaded document to specified format
+    """
+    file_path, file_size = await _ingest_upload(file)
+
     try:
-        # Save uploaded file
-        file_path = save_uploaded_file(content, file.filename)
-        
         # Get file info
-        file_info = get_file_info(file.filename, content)
-        
-        # Convert document
-        success, result, metadata = docling_converter.convert_document(
-            file_path, 
+        file_info = get_file_info(file.filename, file_size)
+
+        # Convert document via the shared conversion path, in the threadpool
+        # so the heavy synchronous Docling call doesn't block the event loop
+        result = await run_in_threadpool(
+            run_conversion,
+            docling_converter,
+            file_path,
             output_format.value
         )
-        
-        if success:
+
+        if result["success"]:
             # Add file info to metadata
-            if metadata:
-                metadata.update(file_info)
-            else:
-                metadata = file_info
-            
-            return ConversionResponse(
-                success=True,
-                message="Document converted successfully",
-                content=result,
-                metadata=metadata
-            )
-        else:
-            return ConversionResponse(
-                success=False,
-                message="Conversion failed",
-                error=result
-            )
-    
-    except Exception as e:
-        logger.error(f"Error in convert_document: {e}")
-        return ConversionResponse(
-            success=False,
-            message="Internal server error",
-            error=str(e)
-        )
-    
+            metadata = result.get("metadata") or {}
+            metadata.update(file_info)
+            result["metadata"] = metadata
+
+        return ConversionResponse(**result)
+
     finally:
         # Clean up temporary file
-        if file_path:
-            cleanup_file(file_path)
+        cleanup_file(file_path)
 
 @app.post("/convert-async")
 async def convert_document_async(
@@ -212,49 +257,39 @@ async def convert_document_async(
     """
     Start asynchronous document conversion and return job ID
     """
-    if not docling_converter:
-        raise HTTPException(status_code=500, detail="Docling converter not available")
-
-    # Validate file
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
+    file_path, file_size = await _ingest_upload(file)
 
-    if not is_supported_file(file.filename):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type. Supported formats: PDF, DOCX, PPTX, XLSX, HTML, MD, Images, CSV, XML"
-        )
-
-    # Check file size (limit to 50MB)
-    content = await file.read()
-    if len(content) > 50 * 1024 * 1024:  # 50MB
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 50MB")
+    # Generate job ID
+    job_id = str(uuid.uuid4())
 
     try:
-        # Save uploaded file
-        file_path = save_uploaded_file(content, file.filename)
-
-        # Generate job ID
-        job_id = str(uuid.uuid4())
-
-        # Initialize job status
-        conversion_jobs[job_id] = {
+        # Initialize job status (threadpool: the store client is synchronous)
+        await run_in_threadpool(job_store.create, job_id, {
             "status": "queued",
             "progress": 0,
             "filename": file.filename,
             "output_format": output_format.value,
-            "created_at": asyncio.get_event_loop().time()
-        }
+            "created_at": time.time()
+        })
 
-        # Submit to thread pool
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(
-            executor,
-            process_document_sync,
-            file_path,
-            output_format.value,
-            job_id
-        )
+        if job_queue is not None:
+            # Hand off to a dedicated worker process via the bounded
+            # queue (threadpool: the queue client is synchronous)
+            await run_in_threadpool(job_queue.enqueue, {
+                "job_id": job_id,
+                "file_path": file_path,
+                "output_format": output_format.value
+            })
+        else:
+            # Fallback: run in this process's thread pool
+            loop = asyncio.get_event_loop()
+            loop.run_in_executor(
+                executor,
+                process_document_sync,
+                file_path,
+                output_format.value,
+                job_id
+            )
 
         return {
             "job_id": job_id,
@@ -262,8 +297,19 @@ async def convert_document_async(
             "message": "Conversion job started"
         }
 
+    except QueueFullError:
+        await run_in_threadpool(job_store.delete, job_id)
+        cleanup_file(file_path)
+        raise HTTPException(status_code=503, detail="Server busy. Please try again later")
+
     except Exception as e:
         logger.error(f"Error in convert_document_async: {e}")
+        # Don't leave the temp file or a phantom queued job behind
+        cleanup_file(file_path)
+        try:
+            await run_in_threadpool(job_store.delete, job_id)
+        except Exception as delete_error:
+            logger.error(f"Error deleting job {job_id} after failed submit: {delete_error}")
         raise HTTPException(status_code=500, detail="Failed to start conversion job")
 
 @app.get("/convert-status/{job_id}")
@@ -271,18 +317,10 @@ async def get_conversion_status(job_id: str):
     """
     Get the status of a conversion job
     """
-    if job_id not in conversion_jobs:
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = conversion_jobs[job_id]
-
-    # Clean up completed jobs older than 1 hour
-    current_time = asyncio.get_event_loop().time()
-    if (job["status"] in ["completed", "failed"] and
-        current_time - job["created_at"] > 3600):
-        del conversion_jobs[job_id]
-        raise HTTPException(status_code=404, detail="Job expired")
-
     return {
         "job_id": job_id,
         "status": job["status"],
@@ -291,43 +329,44 @@ async def get_conversion_status(job_id: str):
         "result": job.get("result")
     }
 
+@app.get("/download/{result_id}")
+async def download_result(result_id: str):
+    """
+    Download a conversion result that was too large to inline
+    """
+    # Result IDs are generated server-side; reject anything path-like
+    if not re.fullmatch(r"[0-9a-f]{32}\.[a-z]+", result_id):
+        raise HTTPException(status_code=404, detail="Result not found")
+
+    result_path = RESULTS_DIR / result_id
+    if not result_path.is_file():
+        raise HTTPException(status_code=404, detail="Result not found")
+
+    return FileResponse(result_path)
+
 @app.get("/formats")
 async def get_supported_formats():
     """Get list of supported input and output formats"""
-    return {
-        "input_formats": [
-            "PDF", "DOCX", "PPTX", "XLSX", "HTML", "MD", 
-            "Images (JPG, PNG, GIF, BMP, TIFF)", "CSV", "XML"
-        ],
-        "output_formats": [
-            {"value": "markdown", "label": "Markdown"},
-            {"value": "html", "label": "HTML"},
-            {"value": "json", "label": "JSON"},
-            {"value": "text", "label": "Plain Text"},
-            {"value": "doctags", "label": "DocTags"}
-        ]
-    }
+    return SUPPORTED_FORMATS
 
 @app.get("/server-stats")
 async def get_server_stats():
     """Get server statistics for monitoring"""
-    active_jobs = len([job for job in conversion_jobs.values() if job["status"] in ["queued", "processing"]])
-    completed_jobs = len([job for job in conversion_jobs.values() if job["status"] == "completed"])
-    failed_jobs = len([job for job in conversion_jobs.values() if job["status"] == "failed"])
+    counts = await run_in_threadpool(job_store.counts)
 
     return {
-        "active_jobs": active_jobs,
-        "completed_jobs": completed_jobs,
-        "failed_jobs": failed_jobs,
-        "total_jobs": len(conversion_jobs),
-        "max_workers": executor._max_workers,
-        "queue_size": executor._work_queue.qsize() if hasattr(executor._work_queue, 'qsize') else 0
+        "active_jobs": counts.get("queued", 0) + counts.get("processing", 0),
+        "completed_jobs": counts.get("completed", 0),
+        "failed_jobs": counts.get("failed", 0),
+        "total_jobs": sum(counts.values()),
+        "max_workers": executor._max_workers if executor else THREAD_POOL_SIZE,
+        "queue_size": executor._work_queue.qsize() if executor and hasattr(executor._work_queue, 'qsize') else 0
     }
 
 @app.exception_handler(413)
 async def request_entity_too_large(request, exc):
     """Handle file too large error"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=413,
         content={"detail": "File too large. Maximum size is 50MB"}
     )
@@ -336,7 +375,7 @@ async def request_entity_too_large(request, exc):
 async def internal_server_error(request, exc):
     """Handle internal server errors"""
     logger.error(f"Internal server error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
@@ -345,11 +384,13 @@ if __name__ == "__main__":
     # Create necessary directories
     Path("static/uploads").mkdir(parents=True, exist_ok=True)
 
-    # Run the application
+    # Run the application with uvloop + httptools for faster I/O handling
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
@@ -21,6 +21,7 @@ class ConversionResponse(BaseModel):
     success: bool
     message: str
     content: Optional[str] = None
+    content_url: Optional[str] = None
     metadata: Optional[dict] = None
     error: Optional[str] = None
 
@@ -1,30 +1,107 @@
 import os
+import time
+import uuid
+import queue
 import tempfile
 import shutil
-import ssl
+import threading
 import certifi
+import orjson
 from pathlib import Path
 from typing import Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from docling.document_converter import DocumentConverter
 from docling_core.types.doc import DoclingDocument
 import logging
 
-# Fix SSL certificate issues
+# Point SSL at certifi's CA bundle so model downloads verify correctly
 os.environ['SSL_CERT_FILE'] = certifi.where()
 os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
 
-# Create unverified SSL context as fallback
-ssl._create_default_https_context = ssl._create_unverified_context
-
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upload limits
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB chunks for streaming uploads to disk
+
+# Conversion results larger than this are written to disk and served via
+# /download instead of being inlined in the JSON response
+RESULT_INLINE_MAX = int(os.getenv("RESULT_INLINE_MAX", 1024 * 1024))  # 1MB
+
+# Directory for stored conversion results
+RESULTS_DIR = Path("static/results")
+
+# Result file extension per output format
+RESULT_EXTENSIONS = {
+    "markdown": ".md",
+    "html": ".html",
+    "json": ".json",
+    "text": ".txt",
+    "doctags": ".txt"
+}
+
+# File extensions accepted for conversion
+SUPPORTED_EXTENSIONS = frozenset({
+    '.pdf', '.docx', '.pptx', '.xlsx', '.html', '.htm',
+    '.md', '.txt', '.csv', '.xml', '.jpg', '.jpeg',
+    '.png', '.gif', '.bmp', '.tiff', '.tif'
+})
+
 class DoclingConverter:
-    """Wrapper class for Docling document conversion"""
-    
-    def __init__(self):
-        """Initialize the document converter"""
+    """Wrapper class for Docling document conversion
+
+    Maintains a fixed-size pool of underlying DocumentConverter
+    instances: converters are not thread-safe and each holds loaded
+    pipeline models, so the count must stay bounded no matter which
+    thread pool runs the conversion. Instances are created lazily up to
+    the pool size and reused afterwards.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None):
+        """Initialize the converter pool"""
+        if pool_size is None:
+            pool_size = int(os.getenv("THREAD_POOL_SIZE", os.cpu_count() or 4))
+        self._pool_size = pool_size
+        self._pool: queue.Queue = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # Build the first converter eagerly so startup fails fast if
+        # Docling can't be initialized at all
+        self._pool.put(self._create_converter())
+        self._created = 1
+
+    def _acquire_converter(self) -> DocumentConverter:
+        """Take a converter from the pool, creating one if under the cap"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self._pool_size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._create_converter()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool is at capacity: wait for a converter to be released
+        return self._pool.get()
+
+    def _release_converter(self, converter: DocumentConverter) -> None:
+        """Return a converter to the pool"""
+        self._pool.put(converter)
+
+    def _create_converter(self) -> DocumentConverter:
+        """Build a DocumentConverter instance"""
         try:
             # Try to initialize with offline-friendly configuration
             from docling.datamodel.pipeline_options import PdfPipelineOptions
@@ -39,14 +116,16 @@ class DoclingConverter:
                 InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
             }
 
-            self.converter = DocumentConverter(format_options=format_options)
+            converter = DocumentConverter(format_options=format_options)
             logger.info("Docling DocumentConverter initialized successfully")
+            return converter
         except Exception as e:
             logger.warning(f"Failed to initialize with custom options: {e}")
             try:
                 # Fallback to default initialization
-                self.converter = DocumentConverter()
+                converter = DocumentConverter()
                 logger.info("Docling DocumentConverter initialized with default settings")
+                return converter
             except Exception as e2:
                 logger.error(f"Failed to initialize DocumentConverter: {e2}")
                 raise
@@ -65,7 +144,11 @@ class DoclingConverter:
         try:
             # Convert document
             logger.info(f"Converting document: {file_path}")
-            result = self.converter.convert(file_path)
+            converter = self._acquire_converter()
+            try:
+                result = converter.convert(file_path)
+            finally:
+                self._release_converter(converter)
             
             if not result.document:
                 return False, "Failed to convert document", None
@@ -80,8 +163,10 @@ class DoclingConverter:
             elif output_format == "json":
                 content = doc.export_to_dict()
                 # Convert to JSON string for consistent return type
-                import json
-                content = json.dumps(content, indent=2, ensure_ascii=False)
+                content = orjson.dumps(
+                    content,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ).decode()
             elif output_format == "text":
                 # Extract plain text from all text items
                 content = self._extract_plain_text(doc)
@@ -130,41 +215,173 @@ class DoclingConverter:
             logger.error(f"Error extracting plain text: {e}")
             return f"Error extracting text: {str(e)}"
 
-def save_uploaded_file(file_content: bytes, filename: str) -> str:
+def run_conversion(converter: DoclingConverter, file_path: str, output_format: str) -> dict:
     """
-    Save uploaded file to temporary directory
-    
+    Run a conversion and build the result payload
+
+    Shared by the synchronous endpoint, the thread pool fallback and the
+    queue workers so they all produce the same result structure.
+
     Args:
-        file_content: File content as bytes
-        filename: Original filename
-        
+        converter: DoclingConverter instance to use
+        file_path: Path to the input document
+        output_format: Output format (markdown, html, json, text, doctags)
+
     Returns:
-        Path to saved file
+        Dictionary with success, message and content/metadata or error
     """
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = Path("static/uploads")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Create temporary file with original extension
-        file_extension = Path(filename).suffix
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False, 
-            suffix=file_extension,
-            dir=upload_dir
+        success, result, metadata = converter.convert_document(file_path, output_format)
+
+        if success:
+            payload = {
+                "success": True,
+                "message": "Document converted successfully",
+                "content": result,
+                "metadata": metadata
+            }
+            # Spill oversized results to disk and hand back a download
+            # URL instead of inlining megabytes into the JSON response
+            if len(result) > RESULT_INLINE_MAX:
+                result_id = store_result_file(result, output_format)
+                payload["content"] = None
+                payload["content_url"] = f"/download/{result_id}"
+            return payload
+        return {
+            "success": False,
+            "message": "Conversion failed",
+            "error": result
+        }
+    except Exception as e:
+        logger.error(f"Error running conversion: {e}")
+        return {
+            "success": False,
+            "message": "Internal server error",
+            "error": str(e)
+        }
+
+def store_result_file(content: str, output_format: str) -> str:
+    """
+    Write a conversion result to the results directory
+
+    Args:
+        content: Converted document content
+        output_format: Output format the content was produced in
+
+    Returns:
+        Result ID (the stored filename) for use in download URLs
+    """
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result_id = uuid.uuid4().hex + RESULT_EXTENSIONS.get(output_format, ".txt")
+    result_path = RESULTS_DIR / result_id
+    result_path.write_text(content, encoding="utf-8")
+    logger.info(f"Result stored: {result_path} ({len(content)} chars)")
+    return result_id
+
+def cleanup_old_results(max_age_seconds: int) -> int:
+    """
+    Delete stored result files older than max_age_seconds
+
+    Args:
+        max_age_seconds: Age threshold in seconds
+
+    Returns:
+        Number of files removed
+    """
+    if not RESULTS_DIR.exists():
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for result_path in RESULTS_DIR.iterdir():
+        try:
+            if result_path.is_file() and result_path.stat().st_mtime < cutoff:
+                result_path.unlink()
+                removed += 1
+        except OSError as e:
+            logger.error(f"Error removing result file {result_path}: {e}")
+    return removed
+
+def validate_content_length(content_length: Optional[str]) -> None:
+    """
+    Reject a request up front when its declared Content-Length already
+    exceeds the upload limit, before any of the body is read
+
+    Args:
+        content_length: Value of the Content-Length header, if present
+    """
+    if content_length is None:
+        return
+    try:
+        length = int(content_length)
+    except ValueError:
+        return
+    if length > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
         )
-        
-        # Write content to file
-        temp_file.write(file_content)
-        temp_file.close()
-        
-        logger.info(f"File saved: {temp_file.name}")
-        return temp_file.name
-        
+
+class _LimitedWriter:
+    """File-like wrapper that enforces the upload size limit while copying"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.size = 0
+
+    def write(self, chunk: bytes) -> int:
+        self.size += len(chunk)
+        if self.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+            )
+        return self.raw.write(chunk)
+
+def _copy_upload(src, temp_path: str) -> int:
+    """Copy an upload to disk with shutil.copyfileobj, returning its size"""
+    with open(temp_path, "wb") as out_file:
+        writer = _LimitedWriter(out_file)
+        shutil.copyfileobj(src, writer, length=UPLOAD_CHUNK_SIZE)
+    return writer.size
+
+async def save_uploaded_file(file: UploadFile, filename: str) -> Tuple[str, int]:
+    """
+    Stream uploaded file to temporary directory
+
+    The copy runs in the threadpool via shutil.copyfileobj on the
+    underlying file object, avoiding a per-chunk round trip through the
+    event loop.
+
+    Args:
+        file: Uploaded file to stream to disk
+        filename: Original filename
+
+    Returns:
+        Tuple of (path to saved file, file size in bytes)
+    """
+    # Create uploads directory if it doesn't exist
+    upload_dir = Path("static/uploads")
+    upload_dir.mkdir(parents=True, exist_ok=True)
+
+    # Create temporary file with original extension
+    file_extension = Path(filename).suffix
+    fd, temp_path = tempfile.mkstemp(suffix=file_extension, dir=upload_dir)
+    os.close(fd)
+
+    try:
+        file_size = await run_in_threadpool(_copy_upload, file.file, temp_path)
+    except HTTPException:
+        cleanup_file(temp_path)
+        raise
     except Exception as e:
+        cleanup_file(temp_path)
         logger.error(f"Error saving file: {e}")
         raise
 
+    logger.info(f"File saved: {temp_path} ({file_size} bytes)")
+    return temp_path, file_size
+
 def cleanup_file(file_path: str) -> None:
     """
     Clean up temporary file
@@ -179,22 +396,22 @@ def cleanup_file(file_path: str) -> None:
     except Exception as e:
         logger.error(f"Error cleaning up file {file_path}: {e}")
 
-def get_file_info(filename: str, content: bytes) -> dict:
+def get_file_info(filename: str, file_size: int) -> dict:
     """
     Get file information
-    
+
     Args:
         filename: Original filename
-        content: File content
-        
+        file_size: File size in bytes
+
     Returns:
         Dictionary with file information
     """
     return {
         "filename": filename,
-        "size": len(content),
+        "size": file_size,
         "extension": Path(filename).suffix.lower(),
-        "size_mb": round(len(content) / (1024 * 1024), 2)
+        "size_mb": round(file_size / (1024 * 1024), 2)
     }
 
 def is_supported_file(filename: str) -> bool:
@@ -207,11 +424,5 @@ def is_supported_file(filename: str) -> bool:
     Returns:
         True if supported, False otherwise
     """
-    supported_extensions = {
-        '.pdf', '.docx', '.pptx', '.xlsx', '.html', '.htm', 
-        '.md', '.txt', '.csv', '.xml', '.jpg', '.jpeg', 
-        '.png', '.gif', '.bmp', '.tiff', '.tif'
-    }
-    
     extension = Path(filename).suffix.lower()
-    return extension in supported_extensions
+    return extension in SUPPORTED_EXTENSIONS
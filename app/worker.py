@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Standalone conversion worker
+
+Consumes jobs from the Redis queue and runs Docling conversions outside
+the API server process. Requires REDIS_URL to be set. Run one or more
+workers with:
+
+    python -m app.worker
+"""
+
+import time
+import logging
+
+from .job_queue import create_job_queue
+from .job_store import create_job_store
+from .utils import DoclingConverter, run_conversion, cleanup_file
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How long to wait before retrying after a queue/store error
+RETRY_BACKOFF_SECONDS = 5
+
+def process_job(converter: DoclingConverter, job_store, payload: dict) -> None:
+    """Run a single conversion job and record its outcome in the job store"""
+    job_id = payload["job_id"]
+    file_path = payload["file_path"]
+    output_format = payload["output_format"]
+
+    try:
+        # Update job status
+        job_store.update(job_id, status="processing", progress=10)
+
+        # Convert document via the shared conversion path
+        result = run_conversion(converter, file_path, output_format)
+
+        job_store.update(
+            job_id,
+            status="completed" if result["success"] else "failed",
+            progress=100,
+            result=result
+        )
+    finally:
+        # Clean up file
+        cleanup_file(file_path)
+
+def main():
+    """Main worker loop: block on the queue and process jobs one at a time"""
+    job_queue = create_job_queue()
+    if job_queue is None:
+        raise SystemExit("REDIS_URL must be set to run the conversion worker")
+
+    job_store = create_job_store()
+    converter = DoclingConverter()
+    logger.info("Conversion worker started")
+
+    while True:
+        # A transient Redis error (e.g. connection reset during the
+        # blocking pop or a status update) must not kill the worker and
+        # strand every queued job, so log it, back off and keep going
+        try:
+            payload = job_queue.dequeue()
+            if payload is None:
+                continue
+            logger.info(f"Processing job {payload['job_id']}")
+            process_job(converter, job_store, payload)
+        except Exception as e:
+            logger.error(f"Worker loop error: {e}")
+            time.sleep(RETRY_BACKOFF_SECONDS)
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,28 @@ export class ApiError extends Error {
   }
 }
 
+export async function fetchResultContent(contentUrl: string): Promise<string> {
+  const response = await fetch(`${API_BASE_URL}${contentUrl}`);
+  if (!response.ok) {
+    throw new ApiError(response.status, 'Failed to fetch conversion result');
+  }
+  return await response.text();
+}
+
+async function resolveContentUrl(result: ConversionResponse): Promise<ConversionResponse> {
+  // Results above the server's inline limit are spilled to disk and
+  // referenced by content_url; hydrate them here so components can keep
+  // working with content
+  if (result.success && !result.content && result.content_url) {
+    try {
+      result.content = await fetchResultContent(result.content_url);
+    } catch (error) {
+      console.error('Failed to fetch conversion result content:', error);
+    }
+  }
+  return result;
+}
+
 export async function checkHealth(): Promise<HealthResponse> {
   try {
     const response = await fetch(`${API_BASE_URL}/health`);
@@ -85,7 +107,7 @@ export async function convertDocument(
     }
 
     const result = await response.json();
-    return result;
+    return await resolveContentUrl(result);
   } catch (error) {
     if (error instanceof ApiError) throw error;
     throw new ApiError(500, 'Failed to convert document');
@@ -135,7 +157,11 @@ export async function getJobStatus(jobId: string, signal?: AbortSignal): Promise
       throw new ApiError(response.status, errorData.detail || 'Failed to get job status');
     }
 
-    return await response.json();
+    const status: JobStatusResponse = await response.json();
+    if (status.result) {
+      status.result = await resolveContentUrl(status.result);
+    }
+    return status;
   } catch (error) {
     if (error instanceof ApiError) throw error;
     throw new ApiError(500, 'Failed to get job status');
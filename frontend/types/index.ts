@@ -2,6 +2,7 @@ export interface ConversionResponse {
   success: boolean;
   message: string;
   content?: string;
+  content_url?: string;
   metadata?: {
     filename: string;
     size: number;
@@ -29,9 +29,23 @@ def main():
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
     reload = os.getenv("RELOAD", "true").lower() == "true"
-    
+    workers = int(os.getenv("WORKERS", 1))
+
+    # Multiple workers need shared job state: without REDIS_URL each
+    # worker keeps its own in-process store and status polls would
+    # land on the wrong worker
+    if workers > 1 and not os.getenv("REDIS_URL"):
+        print("⚠️  WORKERS > 1 requires REDIS_URL for shared job state, falling back to 1 worker")
+        workers = 1
+
+    # uvicorn does not support auto-reload with multiple workers
+    if workers > 1 and reload:
+        print("⚠️  Auto-reload is not supported with multiple workers, disabling it")
+        reload = False
+
     print(f"📡 Server will run on: http://{host}:{port}")
     print(f"🔄 Auto-reload: {'enabled' if reload else 'disabled'}")
+    print(f"👷 Workers: {workers}")
     print("📁 Upload directory: static/uploads")
     print("🔧 Concurrent processing: enabled")
     print("⚡ Async conversion: enabled")
@@ -41,12 +55,15 @@ def main():
     print("📊 Server Stats: Available in frontend (bottom-right)")
     print("="*50 + "\n")
     
-    # Run the server
+    # Run the server with uvloop + httptools for faster I/O handling
     uvicorn.run(
         "app.main:app",
         host=host,
         port=port,
         reload=reload,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
 